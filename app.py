@@ -1,93 +1,449 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.security import generate_password_hash, check_password_hash
-import firebase_admin
-from firebase_admin import credentials, firestore
 from datetime import datetime
+from dataclasses import dataclass
 import os
 import traceback
 import json
+import threading
+import orjson
+import hmac
+import hashlib
+import time
+from collections import OrderedDict
+from operator import itemgetter
+import re
+import math
+
+class ORJSONProvider(DefaultJSONProvider):
+    # orjson for jsonify() and |tojson, kept output-compatible with Flask's
+    # default provider: keys sorted, and date/datetime passed through to
+    # default() so they stay HTTP dates rather than orjson's ISO strings.
+    # Decimals and other types orjson rejects also reach default().
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.secret_key = os.environ.get("FLASK_SECRET", "akhila_secret_key_123")
 
 # ----------------- Firebase Initialization -----------------
-try:
+# firebase_admin and google.cloud.firestore pull in grpc, protobuf and
+# google.api_core, which dominate import time. They are imported on first
+# use rather than at module load, so a fresh worker can answer /health
+# before any of that is loaded.
+_db = None
+_db_lock = threading.Lock()
+
+def _load_credentials():
+    from firebase_admin import credentials
     # Render Secret File
     firebase_path = "/etc/secrets/firebase_config.json"
     if os.path.exists(firebase_path):
         with open(firebase_path) as f:
             cred_dict = json.load(f)
-        cred = credentials.Certificate(cred_dict)
-    else:
-        # fallback to local file
-        cred_path = os.path.join(os.path.dirname(__file__), "firebase_config.json")
-        if not os.path.exists(cred_path):
-            raise FileNotFoundError("Place firebase_config.json in project root (service account).")
-        cred = credentials.Certificate(cred_path)
+        return credentials.Certificate(cred_dict)
+    # fallback to local file
+    cred_path = os.path.join(os.path.dirname(__file__), "firebase_config.json")
+    if not os.path.exists(cred_path):
+        raise FileNotFoundError("Place firebase_config.json in project root (service account).")
+    return credentials.Certificate(cred_path)
+
+def get_db():
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                try:
+                    import firebase_admin
+                    from firebase_admin import firestore
+                    if not firebase_admin._apps:
+                        firebase_admin.initialize_app(_load_credentials())
+                    _db = firestore.client()
+                except Exception as e:
+                    raise RuntimeError(f"Firebase initialization failed: {e}")
+    return _db
 
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-except Exception as e:
-    raise RuntimeError(f"Firebase initialization failed: {e}")
+def _firestore():
+    # Already in sys.modules once get_db() has run, so this is a dict lookup.
+    from firebase_admin import firestore
+    return firestore
+
+def _run_txn(fn, *args):
+    # firestore.transactional is applied here rather than as a decorator so
+    # the module imports without firebase_admin.
+    return _firestore().transactional(fn)(get_db().transaction(), *args)
 
 USERS_COL = "users"
 EXPENSES_COL = "expenses"
+STATS_COL = "user_stats"
+# Bumped when the stats doc layout changes; older docs are rebuilt on read.
+STATS_SCHEMA = 2
+# Firestore caps a transaction at 500 writes; one is reserved for the stats doc.
+MAX_BULK_EXPENSES = 499
 
 # ----------------- Helpers -----------------
+@dataclass(slots=True)
+class Expense:
+    id: str
+    user_id: str
+    description: str
+    amount: float
+    category: str
+    date: str
+    created_at: object = None
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        d = snap.to_dict()
+        return cls(
+            id=snap.id,
+            user_id=d.get("user_id"),
+            description=d.get("description", ""),
+            amount=float(d.get("amount", 0) or 0),
+            # Legacy rows may hold an empty or non-string category.
+            category=str(d.get("category") or "Other"),
+            date=d.get("date", ""),
+            created_at=d.get("created_at"),
+        )
+
 def get_user_by_username(username):
-    docs = db.collection(USERS_COL).where("username", "==", username).limit(1).stream()
+    # Users are keyed by username, so this is a single point read. Names
+    # that cannot be document ids skip it; only legacy accounts can hold them.
+    if valid_username(username):
+        doc = get_db().collection(USERS_COL).document(username).get()
+        data = doc.to_dict() if doc.exists else None
+        # A legacy account's auto-generated id is not its username; its
+        # stored username field says so.
+        if data is not None and data.get("username", username) == username:
+            data["id"] = doc.id
+            return data
+    # Accounts created before the switch have auto-generated ids.
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    docs = get_db().collection(USERS_COL).where(filter=FieldFilter("username", "==", username)).limit(1).stream()
     for d in docs:
         data = d.to_dict()
         data["id"] = d.id
         return data
     return None
 
+def valid_doc_id(value):
+    # Firestore document id rules; ids breaking them fail server-side.
+    return isinstance(value, str) and bool(value) and "/" not in value and value not in (".", "..") and not (
+        value.startswith("__") and value.endswith("__")) and (
+        len(value.encode("utf-8", "surrogatepass")) <= 1500)
+
+def valid_username(username):
+    # Usernames double as Firestore document ids.
+    return valid_doc_id(username)
+
+# Short-lived LRU cache of password check results. Keys hold an HMAC of the
+# password under a per-process pepper, never the password itself, and
+# include the stored hash so a password change invalidates old entries.
+_PEPPER = os.urandom(16)
+_AUTH_CACHE_TTL = 5
+_AUTH_CACHE_SIZE = 1024
+_auth_cache = OrderedDict()
+
+def verify_password(username, stored_hash, password):
+    fingerprint = hmac.new(_PEPPER, password.encode(), hashlib.sha256).digest()
+    key = (username, stored_hash, fingerprint, int(time.time() // _AUTH_CACHE_TTL))
+    ok = _auth_cache.get(key)
+    if ok is None:
+        ok = check_password_hash(stored_hash, password)
+        _auth_cache[key] = ok
+        if len(_auth_cache) > _AUTH_CACHE_SIZE:
+            _auth_cache.popitem(last=False)
+    else:
+        try:
+            _auth_cache.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread since the get(); nothing to refresh.
+            pass
+    return ok
+
 def create_user(username, password):
     pw_hash = generate_password_hash(password)
-    doc_ref = db.collection(USERS_COL).document()
-    doc_ref.set({"username": username, "password": pw_hash, "created_at": firestore.SERVER_TIMESTAMP})
+    doc_ref = get_db().collection(USERS_COL).document(username)
+    # create() fails with AlreadyExists instead of overwriting a concurrent registration.
+    doc_ref.create({"password": pw_hash, "created_at": _firestore().SERVER_TIMESTAMP})
     return doc_ref.id
 
+def _stats_ref(user_id):
+    return get_db().collection(STATS_COL).document(user_id)
+
+def _category_key(cat):
+    # Category text is user-typed, and Firestore rejects field names like
+    # __x__ or over 1,500 bytes, so the categories map is keyed by a digest
+    # and each entry carries the name itself.
+    return hashlib.sha256(cat.encode("utf-8", "surrogatepass")).hexdigest()
+
+def _stats_delta(*changes):
+    # (category, amount) pairs -> merge-set payload of Increment transforms.
+    cats = {}
+    for cat, amt in changes:
+        cats[cat] = cats.get(cat, 0) + amt
+    firestore = _firestore()
+    return {
+        "total": firestore.Increment(sum(amt for _, amt in changes)),
+        "categories": {
+            _category_key(cat): {"name": cat, "total": firestore.Increment(amt)}
+            for cat, amt in cats.items()
+        },
+        # Bumped on every write; keys the rendered dashboard cache.
+        "version": firestore.Increment(1),
+    }
+
+def parse_amount(value):
+    # NaN/inf would poison the stats doc: Increment(nan) can never be undone.
+    if isinstance(value, bool):
+        raise ValueError("Amount must be a number")
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("Amount must be a number")
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a finite number")
+    return amount
+
+def parse_category(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError("Category is required")
+    return value
+
 def add_expense(description, amount, date, category, user_id):
-    doc_ref = db.collection(EXPENSES_COL).document()
-    doc_ref.set({
+    amount = parse_amount(amount)
+    doc_ref = get_db().collection(EXPENSES_COL).document()
+    batch = get_db().batch()
+    batch.set(doc_ref, {
         "description": description,
-        "amount": float(amount),
+        "amount": amount,
         "date": date,
         "category": category,
         "user_id": user_id,
-        "created_at": firestore.SERVER_TIMESTAMP
+        "created_at": _firestore().SERVER_TIMESTAMP
     })
+    batch.set(_stats_ref(user_id), _stats_delta((category, amount)), merge=True)
+    batch.commit()
     return doc_ref.id
 
-def get_expenses(user_id):
-    docs = db.collection(EXPENSES_COL).where("user_id", "==", user_id).stream()
-    items = []
-    for d in docs:
-        doc = d.to_dict()
-        doc["id"] = d.id
-        items.append(doc)
+def _update_expense_txn(transaction, doc_ref, fields):
+    snap = doc_ref.get(transaction=transaction)
+    if not snap.exists:
+        return
+    old = Expense.from_snapshot(snap)
+    transaction.update(doc_ref, fields)
+    transaction.set(_stats_ref(old.user_id), _stats_delta(
+        (old.category, -old.amount),
+        (fields["category"], fields["amount"]),
+    ), merge=True)
 
-    def sort_key(e):
-        if "created_at" in e and e["created_at"] is not None:
-            return e["created_at"].timestamp()
-        try:
-            return datetime.strptime(e.get("date", ""), "%Y-%m-%d").timestamp()
-        except Exception:
-            return 0
+def update_expense(expense_id, description, amount, date, category):
+    _run_txn(_update_expense_txn, get_db().collection(EXPENSES_COL).document(expense_id), {
+        "description": description,
+        "amount": parse_amount(amount),
+        "date": date,
+        "category": parse_category(category)
+    })
+
+def _remove_expense_txn(transaction, doc_ref):
+    snap = doc_ref.get(transaction=transaction)
+    if not snap.exists:
+        return
+    old = Expense.from_snapshot(snap)
+    transaction.delete(doc_ref)
+    transaction.set(_stats_ref(old.user_id), _stats_delta(
+        (old.category, -old.amount),
+    ), merge=True)
+
+def remove_expense(expense_id):
+    _run_txn(_remove_expense_txn, get_db().collection(EXPENSES_COL).document(expense_id))
+
+class ExpenseNotFound(Exception):
+    pass
+
+def _owned_expenses(transaction, expense_ids, user_id):
+    # One get_all() round-trip for every row; the whole batch fails if any
+    # row is missing or belongs to someone else.
+    coll = get_db().collection(EXPENSES_COL)
+    owned = []
+    for snap in transaction.get_all([coll.document(eid) for eid in expense_ids]):
+        if not snap.exists:
+            raise ExpenseNotFound(snap.id)
+        old = Expense.from_snapshot(snap)
+        if old.user_id != user_id:
+            raise PermissionError(snap.id)
+        owned.append((snap.reference, old))
+    return owned
+
+def _remove_expenses_txn(transaction, expense_ids, user_id):
+    owned = _owned_expenses(transaction, expense_ids, user_id)
+    for ref, _ in owned:
+        transaction.delete(ref)
+    if owned:
+        transaction.set(_stats_ref(user_id), _stats_delta(
+            *((old.category, -old.amount) for _, old in owned)
+        ), merge=True)
+
+def remove_expenses(expense_ids, user_id):
+    _run_txn(_remove_expenses_txn, expense_ids, user_id)
+
+def _update_expenses_txn(transaction, updates, user_id):
+    owned = _owned_expenses(transaction, list(updates), user_id)
+    changes = []
+    for ref, old in owned:
+        fields = updates[ref.id]
+        transaction.update(ref, fields)
+        changes.append((old.category, -old.amount))
+        changes.append((fields.get("category", old.category), fields.get("amount", old.amount)))
+    if changes:
+        transaction.set(_stats_ref(user_id), _stats_delta(*changes), merge=True)
+
+def update_expenses(updates, user_id):
+    # updates maps expense id -> dict of the fields to change.
+    _run_txn(_update_expenses_txn, updates, user_id)
+
+def get_expenses(user_id, limit=None):
+    # Newest first; served by the (user_id, created_at DESC) composite index
+    # declared in firestore.indexes.json.
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    query = (
+        get_db().collection(EXPENSES_COL)
+        .where(filter=FieldFilter("user_id", "==", user_id))
+        .order_by("created_at", direction=_firestore().Query.DESCENDING)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    # get() drains a single server-streamed RunQuery call: one round-trip.
+    return [Expense.from_snapshot(d) for d in query.get()]
+
+def aggregate_expenses(expenses):
+    # One pass producing the grand total and per-category totals.
+    total = 0.0
+    cat_totals = {}
+    for e in expenses:
+        total += e.amount
+        cat_totals[e.category] = cat_totals.get(e.category, 0) + e.amount
+    return total, cat_totals
+
+def _stats_usable(data):
+    # Unseeded or old-layout docs hold only partial increments; a non-finite
+    # total means a bad amount got in. Either way the doc has to be rebuilt.
+    return bool(data and data.get("seeded") and data.get("schema") == STATS_SCHEMA) and (
+        math.isfinite(data.get("total", 0)) and all(
+            math.isfinite(e.get("total", 0)) for e in data.get("categories", {}).values()))
+
+def _seed_stats_txn(transaction, user_id):
+    # Rebuild the stats doc from the expenses themselves. A doc created by a
+    # write before seeding only holds increments, so it is overwritten too.
+    stats_ref = _stats_ref(user_id)
+    snap = stats_ref.get(transaction=transaction)
+    data = snap.to_dict() if snap.exists else None
+    if _stats_usable(data):
+        return data
+    # Only amount and category feed the totals; skip the rest on the wire.
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    query = (
+        get_db().collection(EXPENSES_COL)
+        .where(filter=FieldFilter("user_id", "==", user_id))
+        .select(["amount", "category"])
+    )
+    # Rows saved with a non-finite amount before it was rejected are left out,
+    # otherwise the rebuilt totals would be NaN again.
+    rows = (Expense.from_snapshot(d) for d in transaction.get(query))
+    total, cat_totals = aggregate_expenses(e for e in rows if math.isfinite(e.amount))
+    version = (data or {}).get("version", 0) + 1
+    categories = {_category_key(cat): {"name": cat, "total": v} for cat, v in cat_totals.items()}
+    data = {"total": total, "categories": categories, "version": version,
+            "seeded": True, "schema": STATS_SCHEMA}
+    transaction.set(stats_ref, data)
+    return data
+
+def get_stats(user_id):
+    # Per-user totals kept up to date by every expense write; one document read.
+    snap = _stats_ref(user_id).get()
+    data = snap.to_dict() if snap.exists else None
+    if not _stats_usable(data):
+        data = _run_txn(_seed_stats_txn, user_id)
+    # Float Increments drift: sums whose expenses were all edited away or
+    # deleted sit at ~0 (e.g. -3.5e-15), which would render as -0.0.
+    total = data.get("total", 0)
+    if abs(total) < 0.005:
+        total = 0
+    totals = {e["name"]: e["total"] for e in data.get("categories", {}).values()
+              if abs(e.get("total", 0)) >= 0.005}
+    # The map is keyed by digest, so its order means nothing: fixed category
+    # vocabulary first, then hand-typed categories by name.
+    order = [cat for cat in CATEGORY_KEYWORDS if cat in totals]
+    order += sorted(cat for cat in totals if cat not in CATEGORY_KEYWORDS)
+    cat_totals = {cat: totals[cat] for cat in order}
+    return total, cat_totals, data.get("version", 0)
 
-    items.sort(key=sort_key, reverse=True)
-    return items
+def reset_stats(user_id):
+    # Marks the stats doc stale; the next get_stats() rebuilds it from the rows.
+    _stats_ref(user_id).set({"seeded": False}, merge=True)
 
 def get_expense_by_id(expense_id):
-    doc = db.collection(EXPENSES_COL).document(expense_id).get()
+    if not valid_doc_id(expense_id):
+        return None
+    doc = get_db().collection(EXPENSES_COL).document(expense_id).get()
     if doc.exists:
-        d = doc.to_dict()
-        d["id"] = doc.id
-        return d
+        return Expense.from_snapshot(doc)
     return None
 
+# ----------------- Categorization -----------------
+# Checked in this order; the first category with a matching keyword wins.
+CATEGORY_KEYWORDS = {
+    # Food 20+
+    "Food": ("food","grocery","restaurant","biryani","pizza","burger","coffee","tea","snacks","bread","milk","egg","fruits","vegetables","lunch","dinner","breakfast","juice","icecream","cake","noodles","sandwich"),
+
+    # Transport 20+
+    "Transport": ("bus","train","taxi","cab","fuel","travel","uber","ola","metro","auto","petrol","diesel","parking","bike","cycle","toll","flight","ticket","transport","rickshaw","car"),
+
+    # Entertainment 20+
+    "Entertainment": ("movie","netflix","ticket","cinema","game","concert","show","music","spotify","youtube","subscription","theatre","play","amusement","park","event","hobby","streaming","vod","gamepass","karaoke","puzzle"),
+
+    # Housing 20+
+    "Housing": ("rent","house","electricity","water","home","gas","maintenance","internet","wifi","cleaning","maid","repairs","apartment","society","security","tax","insurance","furniture","decor","utility","garden","roof"),
+
+    # Health 20+
+    "Health": ("medicine","doctor","hospital","pharmacy","clinic","checkup","consultation","insurance","dental","eye","surgery","vaccine","therapist","treatment","gym","fitness","vitamins","supplements","diagnosis","therapy","yoga","exercise"),
+
+    # Other 20+
+    "Other": ("clothes","books","stationery","gift","toys","electronics","mobile","charger","bags","shoes","cosmetics","accessories","jewelry","decorations","subscription","pet","gardening","cleaning","misc","tools","craft","hobbyitems"),
+}
+
+# One alternation regex per category, compiled once at import. No word
+# boundaries: keywords match as substrings, as they always have.
+_CATEGORY_PATTERNS = tuple(
+    (cat, re.compile("|".join(map(re.escape, words))))
+    for cat, words in CATEGORY_KEYWORDS.items()
+)
+
+def classify_description(desc):
+    # Categories are tried in CATEGORY_KEYWORDS order; the first match wins.
+    return next((cat for cat, rx in _CATEGORY_PATTERNS if rx.search(desc)), "Other")
+
+CATEGORY_TIPS = {
+    "Food": "Try cooking at home, meal prep, or reduce takeout orders.",
+    "Transport": "Use public transport, carpool, or walk/cycle for short distances.",
+    "Entertainment": "Switch to free/low-cost activities or reduce streaming subscriptions.",
+    "Housing": "Monitor utility usage, save energy, and avoid unnecessary expenses.",
+    "Health": "Look for affordable healthcare options, generic medicines, and preventive care.",
+    "Other": "Track miscellaneous spending and prioritize essentials over luxuries."
+}
+
 # ----------------- Routes -----------------
+@app.route("/health")
+def health():
+    return jsonify({"status": "ok"})
+
 @app.route("/")
 def home():
     if "username" in session:
@@ -102,10 +458,18 @@ def register():
         if not username or not password:
             flash("Please enter username & password", "error")
             return redirect(url_for("register"))
+        if not valid_username(username):
+            flash("Invalid username", "error")
+            return redirect(url_for("register"))
         if get_user_by_username(username):
             flash("Username already exists", "error")
             return redirect(url_for("register"))
-        create_user(username, password)
+        from google.api_core.exceptions import AlreadyExists
+        try:
+            create_user(username, password)
+        except AlreadyExists:
+            flash("Username already exists", "error")
+            return redirect(url_for("register"))
         flash("Registration successful. Please login.", "success")
         return redirect(url_for("login"))
     return render_template("register.html")
@@ -116,7 +480,7 @@ def login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
         user = get_user_by_username(username)
-        if user and check_password_hash(user.get("password", ""), password):
+        if user and verify_password(username, user.get("password", ""), password):
             session["username"] = username
             session["user_id"] = user["id"]
             flash("Logged in successfully", "success")
@@ -131,25 +495,38 @@ def logout():
     flash("Logged out successfully", "success")
     return redirect(url_for("login"))
 
+# Rendered dashboards keyed by (user_id, stats version); any expense write
+# bumps the version, so stale entries are never served and just age out.
+DASHBOARD_CACHE_SIZE = 256
+_dashboard_cache = OrderedDict()
+
 @app.route("/dashboard")
 def dashboard():
     if "username" not in session:
         return redirect(url_for("login"))
     try:
-        expenses = get_expenses(session["user_id"])
-        total = sum(float(e.get("amount", 0)) for e in expenses)
-        recent = expenses[:5]
-        cat_totals = {}
-        for e in expenses:
-            cat = e.get("category", "Other")
-            cat_totals[cat] = cat_totals.get(cat, 0) + float(e.get("amount", 0))
-        return render_template("dashboard.html", total=round(total, 2), recent=recent, cat_totals=cat_totals)
+        user_id = session["user_id"]
+        total, cat_totals, version = get_stats(user_id)
+        # Pending flash messages are rendered into the page, so bypass the cache.
+        cacheable = not session.get("_flashes")
+        key = (user_id, version)
+        # Single get(): another thread may evict the key at any moment.
+        html = _dashboard_cache.get(key) if cacheable else None
+        if html is not None:
+            return html
+        recent = get_expenses(user_id, limit=5)
+        html = render_template("dashboard.html", total=round(total, 2), recent=recent, cat_totals=cat_totals)
+        if cacheable:
+            _dashboard_cache[key] = html
+            if len(_dashboard_cache) > DASHBOARD_CACHE_SIZE:
+                _dashboard_cache.popitem(last=False)
+        return html
     except Exception:
         traceback.print_exc()
         flash("Error loading dashboard", "error")
         return render_template("dashboard.html", total=0, recent=[], cat_totals={})
 
-# ----------------- Add Expense with 20+ items per category -----------------
+# ----------------- Add Expense -----------------
 @app.route("/add_expense", methods=["GET", "POST"])
 def add_expense_route():
     if "username" not in session:
@@ -158,41 +535,10 @@ def add_expense_route():
         try:
             description = request.form.get("description", "").strip()
             amount = request.form.get("amount", "0")
-            date = request.form.get("date") or datetime.now().strftime("%Y-%m-%d")
+            date = request.form.get("date") or datetime.now().date().isoformat()
             desc = description.lower()
 
-            # Food 20+
-            food_keywords = ["food","grocery","restaurant","biryani","pizza","burger","coffee","tea","snacks","bread","milk","egg","fruits","vegetables","lunch","dinner","breakfast","juice","icecream","cake","noodles","sandwich"]
-
-            # Transport 20+
-            transport_keywords = ["bus","train","taxi","cab","fuel","travel","uber","ola","metro","auto","petrol","diesel","parking","bike","cycle","toll","flight","ticket","transport","rickshaw","car"]
-
-            # Entertainment 20+
-            entertainment_keywords = ["movie","netflix","ticket","cinema","game","concert","show","music","spotify","youtube","subscription","theatre","play","amusement","park","event","hobby","streaming","vod","gamepass","karaoke","puzzle"]
-
-            # Housing 20+
-            housing_keywords = ["rent","house","electricity","water","home","gas","maintenance","internet","wifi","cleaning","maid","repairs","apartment","society","security","tax","insurance","furniture","decor","utility","garden","roof"]
-
-            # Health 20+
-            health_keywords = ["medicine","doctor","hospital","pharmacy","clinic","checkup","consultation","insurance","dental","eye","surgery","vaccine","therapist","treatment","gym","fitness","vitamins","supplements","diagnosis","therapy","yoga","exercise"]
-
-            # Other 20+
-            other_keywords = ["clothes","books","stationery","gift","toys","electronics","mobile","charger","bags","shoes","cosmetics","accessories","jewelry","decorations","subscription","pet","gardening","cleaning","misc","tools","craft","hobbyitems"]
-
-            if any(k in desc for k in food_keywords):
-                category = "Food"
-            elif any(k in desc for k in transport_keywords):
-                category = "Transport"
-            elif any(k in desc for k in entertainment_keywords):
-                category = "Entertainment"
-            elif any(k in desc for k in housing_keywords):
-                category = "Housing"
-            elif any(k in desc for k in health_keywords):
-                category = "Health"
-            elif any(k in desc for k in other_keywords):
-                category = "Other"
-            else:
-                category = "Other"
+            category = classify_description(desc)
 
             add_expense(description, amount, date, category, session["user_id"])
             return jsonify({"status": "success", "description": description, "category": category})
@@ -207,9 +553,7 @@ def all_expenses():
     if "username" not in session:
         return redirect(url_for("login"))
     expenses = get_expenses(session["user_id"])
-    totals = {}
-    for e in expenses:
-        totals[e.get("category", "Other")] = totals.get(e.get("category", "Other"), 0) + float(e.get("amount", 0))
+    _, totals = aggregate_expenses(expenses)
     return render_template("all_expenses.html", expenses=expenses, totals=totals)
 
 @app.route("/edit_expense/<expense_id>", methods=["GET", "POST"])
@@ -220,23 +564,21 @@ def edit_expense(expense_id):
     if not doc:
         flash("Expense not found", "error")
         return redirect(url_for("all_expenses"))
-    if doc.get("user_id") != session["user_id"]:
+    if doc.user_id != session["user_id"]:
         flash("Permission denied", "error")
         return redirect(url_for("all_expenses"))
     if request.method == "POST":
         try:
             description = request.form.get("description", "").strip()
-            amount = float(request.form.get("amount", 0))
+            amount = parse_amount(request.form.get("amount", 0))
             date = request.form.get("date")
-            category = request.form.get("category", "Other")
-            db.collection(EXPENSES_COL).document(expense_id).update({
-                "description": description,
-                "amount": amount,
-                "date": date,
-                "category": category
-            })
+            category = parse_category(request.form.get("category", "Other"))
+            update_expense(expense_id, description, amount, date, category)
             flash("Expense updated", "success")
             return redirect(url_for("all_expenses"))
+        except ValueError as e:
+            flash(str(e), "error")
+            return redirect(url_for("edit_expense", expense_id=expense_id))
         except Exception:
             traceback.print_exc()
             flash("Error updating expense", "error")
@@ -250,28 +592,74 @@ def delete_expense(expense_id):
     doc = get_expense_by_id(expense_id)
     if not doc:
         return jsonify({"status": "error", "message": "Not found"}), 404
-    if doc.get("user_id") != session["user_id"]:
+    if doc.user_id != session["user_id"]:
         return jsonify({"status": "error", "message": "Permission denied"}), 403
     try:
-        db.collection(EXPENSES_COL).document(expense_id).delete()
+        remove_expense(expense_id)
         return jsonify({"status": "success", "message": "Deleted"})
     except Exception as e:
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def _bulk_write(write, payload):
+    if not payload:
+        return jsonify({"status": "success", "count": 0})
+    try:
+        write(payload, session["user_id"])
+        return jsonify({"status": "success", "count": len(payload)})
+    except ExpenseNotFound:
+        return jsonify({"status": "error", "message": "Not found"}), 404
+    except PermissionError:
+        return jsonify({"status": "error", "message": "Permission denied"}), 403
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route("/delete_expenses", methods=["POST"])
+def delete_expenses():
+    # Body: JSON list of expense ids, deleted in one transaction.
+    if "username" not in session:
+        return jsonify({"status": "error", "message": "Not logged in"}), 401
+    ids = request.get_json(silent=True)
+    if not isinstance(ids, list) or not all(valid_doc_id(eid) for eid in ids):
+        return jsonify({"status": "error", "message": "Expected a list of expense ids"}), 400
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BULK_EXPENSES:
+        return jsonify({"status": "error", "message": f"At most {MAX_BULK_EXPENSES} expenses per request"}), 400
+    return _bulk_write(remove_expenses, ids)
+
+@app.route("/update_expenses", methods=["POST"])
+def update_expenses_route():
+    # Body: JSON list of {"id", and any of "description", "amount", "date", "category"}.
+    if "username" not in session:
+        return jsonify({"status": "error", "message": "Not logged in"}), 401
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not all(isinstance(i, dict) and valid_doc_id(i.get("id")) for i in items):
+        return jsonify({"status": "error", "message": "Expected a list of expense updates"}), 400
+    updates = {}
+    try:
+        for item in items:
+            fields = {k: item[k] for k in ("description", "date") if k in item}
+            if not all(isinstance(v, str) for v in fields.values()):
+                raise ValueError
+            if "category" in item:
+                fields["category"] = parse_category(item["category"])
+            if "amount" in item:
+                fields["amount"] = parse_amount(item["amount"])
+            if fields:
+                updates[item["id"]] = fields
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid expense fields"}), 400
+    if len(updates) > MAX_BULK_EXPENSES:
+        return jsonify({"status": "error", "message": f"At most {MAX_BULK_EXPENSES} expenses per request"}), 400
+    return _bulk_write(update_expenses, updates)
+
 @app.route("/summary")
 def summary():
     if "username" not in session:
         return redirect(url_for("login"))
-    expenses = get_expenses(session["user_id"])
-    totals = {}
-    total_amount = 0
-    for e in expenses:
-        amt = float(e.get("amount", 0))
-        cat = e.get("category", "Other")
-        totals[cat] = totals.get(cat, 0) + amt
-        total_amount += amt
-    labels = list(totals.keys())
+    _, totals, _ = get_stats(session["user_id"])
+    labels = list(totals)
     values = [round(v, 2) for v in totals.values()]
     return render_template("summary.html", labels=labels, values=values)
 
@@ -279,31 +667,19 @@ def summary():
 def recommendations():
     if 'username' not in session:
         return redirect(url_for('login'))
-    expenses = get_expenses(session['user_id'])
-    category_sum = {}
-    total = 0
-    for e in expenses:
-        amt = float(e.get('amount', 0))
-        total += amt
-        cat = e.get('category', 'Other')
-        category_sum[cat] = category_sum.get(cat, 0) + amt
-    percentages = {k:(v/total*100) for k,v in category_sum.items()} if total>0 else {}
-    category_tips = {
-        "Food": "Try cooking at home, meal prep, or reduce takeout orders.",
-        "Transport": "Use public transport, carpool, or walk/cycle for short distances.",
-        "Entertainment": "Switch to free/low-cost activities or reduce streaming subscriptions.",
-        "Housing": "Monitor utility usage, save energy, and avoid unnecessary expenses.",
-        "Health": "Look for affordable healthcare options, generic medicines, and preventive care.",
-        "Other": "Track miscellaneous spending and prioritize essentials over luxuries."
-    }
-    messages = {}
-    for cat, perc in percentages.items():
-        if perc > 50:
-            messages[cat] = f"💡 Tip: {category_tips.get(cat, 'Reduce unnecessary expenses.')}"
-        else:
-            messages[cat] = "💡 Spending is under control ✅ Don't worry."
-    sorted_percentages = dict(sorted(percentages.items(), key=lambda x: x[1], reverse=True))
-    sorted_messages = {k: messages[k] for k in sorted_percentages.keys()}
+    total, category_sum, _ = get_stats(session['user_id'])
+    rows = []
+    if total > 0:
+        for cat, v in category_sum.items():
+            perc = v / total * 100
+            if perc > 50:
+                msg = f"💡 Tip: {CATEGORY_TIPS.get(cat, 'Reduce unnecessary expenses.')}"
+            else:
+                msg = "💡 Spending is under control ✅ Don't worry."
+            rows.append((cat, perc, msg))
+    rows.sort(key=itemgetter(1), reverse=True)
+    sorted_percentages = {cat: perc for cat, perc, _ in rows}
+    sorted_messages = {cat: msg for cat, _, msg in rows}
     return render_template('recommendations.html', percentages=sorted_percentages, messages=sorted_messages)
 
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+import os
+
+# The Firestore client's gRPC channel does not survive fork(), so each worker
+# must import the app (and build its own client) after forking.
+preload_app = False
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+# Threads in a worker share that worker's single warm channel instead of each
+# request paying for a new connection.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
@@ -0,0 +1,49 @@
+"""One-off backfill of created_at on expense rows that lack it.
+
+get_expenses() orders by created_at, and Firestore leaves documents without
+that field out of ordered queries. Older rows (e.g. written by the removed
+models.py module) only carry a "date" string; this stamps them with that
+date at midnight UTC, or the epoch when the date is missing or malformed,
+so they sort last as they did under the old client-side sort. Safe to
+re-run.
+
+    python migrate_created_at.py
+"""
+from datetime import datetime, timezone
+
+from app import get_db, EXPENSES_COL
+
+BATCH_SIZE = 500
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def created_at_for(date):
+    try:
+        return datetime.fromisoformat(date[:10]).replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return EPOCH
+
+
+def main():
+    db = get_db()
+    batch = db.batch()
+    pending = 0
+    fixed = 0
+    for snap in db.collection(EXPENSES_COL).select(["created_at", "date"]).stream():
+        data = snap.to_dict()
+        if "created_at" in data:
+            continue
+        batch.update(snap.reference, {"created_at": created_at_for(data.get("date"))})
+        pending += 1
+        fixed += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    print(f"Backfilled created_at on {fixed} expense(s).")
+
+
+if __name__ == "__main__":
+    main()